@@ -1,96 +1,122 @@
-import sys, json, math, datetime, os
+import sys, datetime, os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-import options as opts
+from bs_vec import bs_greeks_vec, implied_vol_vec
+import chain_cache
+from build_bs import STAMP, source_hash
 import yfinance as yf
-from scipy.interpolate import LinearNDInterpolator, NearestNDInterpolator
+from scipy.interpolate import RegularGridInterpolator, NearestNDInterpolator
 import numpy as np
-from scipy.stats import norm
+import pandas as pd
+import orjson
 
-def clean(val):
-    if val is None: return None
-    if isinstance(val, float) and (math.isnan(val) or math.isinf(val)): return None
-    return val
+COLS   = ["strike","bid","ask","lastPrice","impliedVolatility","volume","openInterest","inTheMoney"]
+GREEKS = ["BSprice","delta","gamma","vega","theta"]
 
-def safe_float(val):
-    try:
-        f = float(val)
-        return None if (math.isnan(f) or math.isinf(f)) else f
-    except: return None
-
-def row(r):
-    return {k: clean(v) for k, v in r.items() if k in
-        ["strike","bid","ask","lastPrice","impliedVolatility","volume","openInterest","inTheMoney"]}
-
-def is_bad_quote(o):
-    iv = safe_float(o.get("impliedVolatility"))
-    # Only drop missing IV or extreme nonsense (>500%)
-    if iv is None or iv <= 0 or iv > 5.0: return True
+def to_arrays(df):
+    # DataFrame -> dict of float64 columns (SoA); missing cells become NaN
+    return {k: df[k].to_numpy(dtype=np.float64, na_value=np.nan) for k in COLS}
+
+def take(arr, mask):
+    return {k: v[mask] for k, v in arr.items()}
+
+def is_bad_quote(arr):
+    # Works on a DataFrame or a dict of arrays alike
+    iv = arr["impliedVolatility"]
+    # Only drop missing IV or extreme nonsense (>500%); NaN fails every comparison
+    bad_iv = ~((iv > 0) & (iv <= 5.0))
     # Need at least one valid price
-    bid  = safe_float(o.get("bid"))
-    ask  = safe_float(o.get("ask"))
-    last = safe_float(o.get("lastPrice"))
-    has_price = (bid and bid > 0) or (ask and ask > 0) or (last and last > 0)
-    if not has_price: return True
-    return False
-
-def reject_outliers(options_list):
+    has_price = (arr["bid"] > 0) | (arr["ask"] > 0) | (arr["lastPrice"] > 0)
+    return bad_iv | ~has_price
+
+def load_bs_batch():
+    # AOT-compiled greeks kernel (python_code/build_bs.py), only if it was built
+    # from the current kernel sources; None means the NumPy path
+    try:
+        with open(STAMP) as f: stamp = f.read()
+    except OSError: return None
+    if stamp != source_hash():
+        print("bs_compiled is stale; using NumPy greeks (re-run build_bs.py)", file=sys.stderr)
+        return None
+    try: from bs_compiled import bs_batch
+    except ImportError: return None
+    return bs_batch
+
+bs_batch = load_bs_batch()
+
+def add_greeks(arr, is_call, spot, T, r):
+    # Mid-price IV (Yahoo's IV where there's no two-sided quote), then greeks, in place
+    bid, ask, iv_yh = arr["bid"], arr["ask"], arr["impliedVolatility"]
+    mid = np.where((bid > 0) & (ask > 0), (bid + ask) / 2, np.nan)
+    ivs = np.where(np.isnan(mid), iv_yh, implied_vol_vec(mid, spot, arr["strike"], T, r, is_call))
+    arr["impliedVolatility"] = np.where(ivs > 0, ivs, iv_yh)
+    if bs_batch is not None:
+        out = {k: np.empty(ivs.size) for k in GREEKS}
+        bs_batch(float(spot), arr["strike"], float(T), float(r), ivs, is_call, *(out[k] for k in GREEKS))
+        arr.update(out)
+        return
+    bs = bs_greeks_vec(spot, arr["strike"], T, r, ivs, is_call)
+    arr.update({"BSprice": bs["price"], "delta": bs["delta"], "gamma": bs["gamma"],
+                "vega": bs["vega"], "theta": bs["theta"]})
+
+def to_frame(arr):
+    # SoA -> output DataFrame; NaN cells serialize as null
+    df  = pd.DataFrame({k: arr[k] for k in COLS + GREEKS})
+    itm = arr["inTheMoney"]
+    df["inTheMoney"] = np.where(np.isnan(itm), None, itm == 1)
+    return df
+
+def select(df, spot, lo, hi):
+    # One expiry side in a single column pass: moneyness window, numeric
+    # coercion (junk and inf -> NaN), bad-quote mask, IV outlier mask
+    df  = df.loc[(df["strike"]/spot).between(lo, hi), COLS]
+    df  = df.apply(pd.to_numeric, errors="coerce").replace([np.inf, -np.inf], np.nan)
+    arr = to_arrays(df.loc[~is_bad_quote(df)])
     # Very permissive — 3x IQR, only removes extreme spikes
     # Requires at least 8 points to bother filtering
-    ivs = [safe_float(o.get("impliedVolatility")) for o in options_list]
-    ivs_clean = sorted(v for v in ivs if v is not None)
-    if len(ivs_clean) < 8: return options_list
-    q1 = ivs_clean[len(ivs_clean) // 4]
-    q3 = ivs_clean[(3 * len(ivs_clean)) // 4]
+    iv = arr["impliedVolatility"]
+    if iv.size < 8: return arr
+    q1, q3 = np.percentile(iv, [25, 75])
     iqr = q3 - q1
-    lo, hi = q1 - 3.0 * iqr, q3 + 3.0 * iqr
-    return [o for o, iv in zip(options_list, ivs) if iv is not None and lo <= iv <= hi]
-
-def bs_call(S, K, T, r, sigma):
-    d1 = (math.log(S/K) + (r + 0.5*sigma**2)*T) / (sigma*math.sqrt(T))
-    d2 = d1 - sigma*math.sqrt(T)
-    return S*norm.cdf(d1) - K*math.exp(-r*T)*norm.cdf(d2)
-
-def bs_put(S, K, T, r, sigma):
-    d1 = (math.log(S/K) + (r + 0.5*sigma**2)*T) / (sigma*math.sqrt(T))
-    d2 = d1 - sigma*math.sqrt(T)
-    return K*math.exp(-r*T)*norm.cdf(-d2) - S*norm.cdf(-d1)
-
-def solve_iv(market_price, S, K, T, r, is_call):
-    if T <= 0 or not market_price or market_price <= 0: return None
-    intrinsic = max(0.0, (S-K) if not is_call else (K-S))
-    if market_price <= intrinsic + 1e-5: return None
-    fn = bs_call if is_call else bs_put
-    lo, hi = 1e-5, 10.0
-    for _ in range(120):
-        mid = (lo + hi) / 2
-        try: p = fn(S, K, T, r, mid)
-        except: return None
-        if abs(p - market_price) < 1e-6: return mid
-        lo, hi = (mid, hi) if p < market_price else (lo, mid)
-    iv = (lo + hi) / 2
-    return iv if 0.001 < iv < 9.9 else None
-
-def add_greeks(option, is_call, spot, T, r):
-    bid    = safe_float(option.get("bid"))
-    ask    = safe_float(option.get("ask"))
-    strike = safe_float(option.get("strike"))
-    iv_yh  = safe_float(option.get("impliedVolatility"))
-    mid    = (bid + ask) / 2 if (bid and ask and bid > 0 and ask > 0) else None
-    iv     = solve_iv(mid, spot, strike, T, r, is_call) if mid else iv_yh
-    if iv: option["impliedVolatility"] = iv
-    if not iv or iv <= 0 or not strike or strike <= 0 or T <= 0:
-        option.update({"BSprice":None,"delta":None,"gamma":None,"vega":None,"theta":None})
-        return
-    try:
-        bs = (opts.BlackScholesCall if is_call else opts.BlackScholesPut)(spot, iv, strike, T, r)
-        option.update({"BSprice":safe_float(bs.price),"delta":safe_float(bs.delta),
-                       "gamma":safe_float(bs.gamma),"vega":safe_float(bs.vega),"theta":safe_float(bs.theta)})
-    except:
-        option.update({"BSprice":None,"delta":None,"gamma":None,"vega":None,"theta":None})
+    return take(arr, (iv >= q1 - 3.0 * iqr) & (iv <= q3 + 3.0 * iqr))
+
+def fetch_chain(t, date):
+    chain = chain_cache.load(t.ticker, date)
+    if chain is not None: return chain
+
+    # A failed expiry is logged and skipped rather than aborting the whole batch
+    try: raw = t.option_chain(date)
+    except Exception as e:
+        print(f"{date}: fetch failed ({e})", file=sys.stderr)
+        return None
+    chain = chain_cache.Chain(raw.calls, raw.puts)
+
+    try: chain_cache.store(t.ticker, date, chain)
+    except Exception as e:
+        print(f"{date}: cache write failed ({e})", file=sys.stderr)
+    return chain
+
+def compute_greeks_for_expiry(date, chain, spot, T, r):
+    calls = select(chain.calls, spot, 1, 1.15)
+    puts  = select(chain.puts,  spot, 0.85, 1)
+    n     = len(calls["strike"])
+    print(f"{date}: {n} calls, {len(puts['strike'])} puts", file=sys.stderr)
+
+    arr = {k: np.concatenate([calls[k], puts[k]]) for k in COLS}
+    add_greeks(arr, np.arange(len(arr["strike"])) < n, spot, T, r)
+    df  = to_frame(arr)
+    return {"calls": df.iloc[:n], "puts": df.iloc[n:].reset_index(drop=True)}
+
+def surface_points(chain, spot, dte):
+    # (moneyness, dte, iv%) rows for every option of one expiry, as an (n, 3) array
+    if dte < -1: return np.empty((0, 3))
+    return np.vstack([np.column_stack([df["strike"].to_numpy() / spot, np.full(len(df), dte),
+                                       df["impliedVolatility"].to_numpy() * 100])
+                      for df in (chain["calls"], chain["puts"])])
 
 def main():
     ticker = sys.argv[1] if len(sys.argv) > 1 else "SPY"
-    r = sys.argv[2] if len(sys.argv) > 2 else 0.05
+    r = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
     t = yf.Ticker(ticker)
     spot  = t.fast_info["lastPrice"]
     dates = list(t.options)
@@ -105,59 +131,72 @@ def main():
     stride = max(1, len(rest) // 12)
     selected = near + rest[::stride]
 
-    data = {}
-    for date in selected:
-        chain    = t.option_chain(date)
-        calls_df = chain.calls[(chain.calls["strike"]/spot >= 1) & (chain.calls["strike"]/spot <= 1.15)]
-        puts_df  = chain.puts[ (chain.puts["strike"] /spot >= 0.85) & (chain.puts["strike"] /spot <= 1)]
-        calls = reject_outliers([o for o in [row(r_) for r_ in calls_df.to_dict("records")] if not is_bad_quote(o)])
-        puts  = reject_outliers([o for o in [row(r_) for r_ in puts_df.to_dict("records")]  if not is_bad_quote(o)])
-        data[date] = {"calls": calls, "puts": puts}
-        print(f"{date}: {len(calls)} calls, {len(puts)} puts", file=sys.stderr)
-
-    for date, chain in data.items():
-        dt = datetime.datetime.fromisoformat(date) - datetime.datetime.now()
-        T  = (dt.days + dt.seconds/(3600*24)) / 365.0
-        if T <= 0: continue
-        for call in chain["calls"]: add_greeks(call, True,  spot, T, r)
-        for put  in chain["puts"]:  add_greeks(put,  False, spot, T, r)
-    
-
-    all_pts = []
-    for date, chain in data.items():
-        dt  = datetime.datetime.fromisoformat(date) - datetime.datetime.now()
-        dte = dt.days + dt.seconds / (3600 * 24)
-        if dte < -1: continue
-        for opt in chain["calls"] + chain["puts"]:
-            iv     = safe_float(opt.get("impliedVolatility"))
-            strike = safe_float(opt.get("strike"))
-            if iv and strike:
-                all_pts.append((strike / spot, dte, iv * 100))
+    # Year fractions to expiry (negative once expired), computed once up front
+    now    = datetime.datetime.now()
+    T_of   = {d: (datetime.datetime.fromisoformat(d) - now).total_seconds() / 86400 / 365.0 for d in selected}
+    dte_of = {d: T * 365.0 for d, T in T_of.items()}
+
+    # Pipeline: chain downloads are independent HTTPS round-trips running on the
+    # pool, and each expiry's greeks/surface points are computed as soon as its
+    # chain lands, overlapping the CPU work with the remaining network waits.
+    results, pts_by_date = {}, {}
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        futures = {ex.submit(fetch_chain, t, d): d for d in selected}
+        for fut in as_completed(futures):
+            date, chain = futures[fut], fut.result()
+            if chain is None: continue
+            results[date]     = compute_greeks_for_expiry(date, chain, spot, T_of[date], r)
+            pts_by_date[date] = surface_points(results[date], spot, dte_of[date])
+
+    # Back to expiry order for the payload and a deterministic surface
+    data    = {d: results[d] for d in selected if d in results}
+    all_pts = np.vstack([pts_by_date[d] for d in data] or [np.empty((0, 3))])
+    # Columns are float64 with NaN for missing, so one mask drops every unusable row
+    all_pts = all_pts[(all_pts[:,0] > 0) & (all_pts[:,2] > 0)]
 
     print(f"Total points for interpolation: {len(all_pts)}", file=sys.stderr)
 
     surface = None
     if len(all_pts) >= 4:
-        pts  = np.array([(p[0], p[1]) for p in all_pts])
-        vals = np.array([p[2]         for p in all_pts])
-
-        linear  = LinearNDInterpolator(pts, vals)
-        nearest = NearestNDInterpolator(pts, vals)
+        pts, vals = all_pts[:, :2], all_pts[:, 2]
 
         k_grid = np.linspace(pts[:,0].min(), pts[:,0].max(), 50)
         t_grid = np.linspace(pts[:,1].min(), pts[:,1].max(), 50)
         KK, TT = np.meshgrid(k_grid, t_grid)
-        flat   = np.column_stack([KK.ravel(), TT.ravel()])
 
-        zz   = linear(flat)
+        # Points already sit on an (expiry x strike) lattice: interpolate each
+        # expiry's smile onto k_grid, then do a regular-grid lookup across expiries
+        dtes, row_of = np.unique(pts[:,1], return_inverse=True)
+        Z = np.empty((dtes.size, k_grid.size))
+        for i in range(dtes.size):
+            sel = row_of == i
+            # Average duplicated strikes (call and put both at the money)
+            ks, j = np.unique(pts[sel,0], return_inverse=True)
+            Z[i]  = np.interp(k_grid, ks, np.bincount(j, weights=vals[sel]) / np.bincount(j))
+
+        if dtes.size >= 2:
+            grid = RegularGridInterpolator((dtes, k_grid), Z, method="linear", bounds_error=False, fill_value=np.nan)
+            zz   = grid((TT, KK)).ravel()
+        else:
+            # A single expiry means t_grid is constant: every row is that smile
+            zz = np.tile(Z[0], t_grid.size)
+
+        # t_grid spans exactly [dtes.min(), dtes.max()], so this is a safety net;
+        # the KD-tree is only built, and only queried, for cells left NaN
         nans = np.isnan(zz)
         if nans.any():
-            zz[nans] = nearest(flat[nans])
+            flat     = np.column_stack([KK.ravel(), TT.ravel()])
+            zz[nans] = NearestNDInterpolator(pts, vals)(flat[nans])
         ZZ = zz.reshape(50, 50)
 
-        surface = {"x": k_grid.tolist(), "y": t_grid.tolist(), "z": ZZ.tolist()}
+        surface = {"x": k_grid, "y": t_grid, "z": ZZ}
 
-    print(json.dumps({"spot": spot, "data": data, "surface": surface}))
+    # orjson writes NumPy arrays/scalars natively and NaN as null
+    payload = {"spot": spot,
+               "data": {d: {"calls": c["calls"].to_dict("records"), "puts": c["puts"].to_dict("records")}
+                        for d, c in data.items()},
+               "surface": surface}
+    sys.stdout.buffer.write(orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,51 @@
+from math import exp, log, sqrt, pi
+import numpy as np
+from numba import njit
+
+INV_SQRT_2PI = 1.0/sqrt(2*pi)
+
+# fastmath minus nnan/ninf: bad quotes arrive as NaN and must stay NaN
+FASTMATH = {"nsz", "arcp", "contract", "afn", "reassoc"}
+
+@njit(cache=True, fastmath=FASTMATH, inline='always')
+def _phi(x): return INV_SQRT_2PI*exp(-0.5*x*x)
+
+@njit(cache=True, fastmath=FASTMATH, inline='always')
+def _Phi_approx(x, phi_x):
+    # Abramowitz & Stegun 26.2.17, |error| < 7.5e-8: a degree-5 polynomial
+    # instead of a libm erf call. Takes phi(x) so callers can share it.
+    # The bound is absolute, so prices are good to ~7.5e-8*(S+K) (under 1e-4
+    # at S=500, far below a tick) but sub-cent deep-OTM prices lose relative
+    # precision. Accepted: BSprice/greeks here are display-only, IVs are
+    # solved in bs_vec on scipy's ndtr. test_bs_numba.py pins both bounds.
+    if x > 7.0: return 1.0
+    if x < -7.0: return 0.0
+    t = 1.0/(1.0 + 0.2316419*abs(x))
+    q = phi_x*t*(0.319381530 + t*(-0.356563782 + t*(1.781477937 + t*(-1.821255978 + t*1.330274429))))
+    return 1.0 - q if x >= 0 else q
+
+@njit(cache=True, fastmath=FASTMATH)
+def bs_terms(S, K, T, r, sigma):
+    # (d1, d2, Phi(d1), Phi(d2), phi(d1), sqrt(T), exp(-rT)) shared by the price and every greek
+    if not (sigma > 0 and K > 0 and T > 0):
+        return np.nan, np.nan, np.nan, np.nan, np.nan, np.nan, np.nan
+    sqrtT  = sqrt(T)
+    vsqrtT = sigma*sqrtT
+    disc   = exp(-r*T)
+    d1     = (log(S/K) + (r + 0.5*sigma*sigma)*T) / vsqrtT
+    d2     = d1 - vsqrtT
+    phid1  = _phi(d1)
+    # phi(d2) = phi(d1)*S/(K*exp(-rT)), so neither CDF costs another exp
+    return d1, d2, _Phi_approx(d1, phid1), _Phi_approx(d2, phid1*S/(K*disc)), phid1, sqrtT, disc
+
+@njit(cache=True, fastmath=FASTMATH)
+def bs_one(S, K, T, r, sigma, is_call):
+    # (price, delta, gamma, vega, theta) for a single option, NaNs if unpriceable
+    d1, d2, Nd1, Nd2, phid1, sqrtT, disc = bs_terms(S, K, T, r, sigma)
+    Kdisc = K*disc
+    gamma = phid1/(S*sigma*sqrtT)
+    vega  = S*phid1*sqrtT
+    decay = -(S*sigma*phid1)/(2*sqrtT)
+    if is_call:
+        return S*Nd1 - Kdisc*Nd2, Nd1, gamma, vega, (decay - r*Kdisc*Nd2)/365
+    return Kdisc*(1 - Nd2) - S*(1 - Nd1), Nd1 - 1, gamma, vega, (decay + r*Kdisc*(1 - Nd2))/365
@@ -0,0 +1,114 @@
+from math import sqrt, pi
+import numpy as np
+from scipy.special import ndtr as _Phi
+
+SQRT_2PI = sqrt(2*pi)
+
+def _phi(x): return np.exp(-0.5*x*x) / SQRT_2PI
+
+def _bs_fixed(S, K, T, r):
+    # Sigma-independent terms, hoisted out of the IV iterations:
+    # log(S/K) + rT, sqrt(T) and the discounted strike
+    return np.log(S/K) + r*T, sqrt(T), K*np.exp(-r*T)
+
+def _bs_terms(fwd, T, sqrtT, sigma):
+    # Sigma-dependent terms shared by the price, every greek and the IV solver
+    vsqrtT = sigma*sqrtT
+    d1     = (fwd + 0.5*sigma*sigma*T) / vsqrtT
+    d2     = d1 - vsqrtT
+    # Two ndtr calls on purpose: packing d1/d2 into one buffer for a single
+    # dispatch measured slower at chain sizes (30-400 rows) than the extra
+    # ufunc call it saves. Puts reuse these via 1 - N(x).
+    Nd1    = _Phi(d1)
+    Nd2    = _Phi(d2)
+    phid1  = _phi(d1)
+    return vsqrtT, d1, d2, Nd1, Nd2, phid1
+
+def _bs_price(S, Nd1, Nd2, Kdisc, is_call):
+    return np.where(is_call, S*Nd1 - Kdisc*Nd2, Kdisc*(1 - Nd2) - S*(1 - Nd1))
+
+def bs_greeks_vec(S, K, T, r, sigma, is_call):
+    # Black-Scholes price and greeks for a whole expiry in one shot.
+    # S, T, r are scalars; K, sigma, is_call are arrays of the same length.
+    # Rows with a missing/invalid sigma or strike come back as NaN.
+    K       = np.asarray(K, dtype=np.float64)
+    sigma   = np.asarray(sigma, dtype=np.float64)
+    is_call = np.asarray(is_call, dtype=bool)
+    if T <= 0: return {k: np.full(K.shape, np.nan) for k in ("price", "delta", "gamma", "vega", "theta")}
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fwd, sqrtT, Kdisc = _bs_fixed(S, K, T, r)
+        vsqrtT, d1, d2, Nd1, Nd2, phid1 = _bs_terms(fwd, T, sqrtT, sigma)
+        decay      = -(S*sigma*phid1) / (2*sqrtT)
+        call_theta = (decay - r*Kdisc*Nd2) / 365
+        put_theta  = (decay + r*Kdisc*(1 - Nd2)) / 365
+
+        out = {
+            "price": _bs_price(S, Nd1, Nd2, Kdisc, is_call),
+            "delta": np.where(is_call, Nd1, Nd1 - 1),
+            "gamma": phid1 / (S*vsqrtT),
+            "vega":  S*phid1*sqrtT,
+            "theta": np.where(is_call, call_theta, put_theta),
+        }
+
+    bad = ~((sigma > 0) & (K > 0))
+    for v in out.values(): v[bad] = np.nan
+    return out
+
+def implied_vol_vec(price, S, K, T, r, is_call):
+    # Solve Black-Scholes IV for every option of an expiry at once.
+    # Halley (Householder order 2) on price(sigma) - market with analytic
+    # vega and volga from a Brenner-Subrahmanyam seed; the few rows that
+    # don't converge in 8 steps are finished off by a vectorized bisection.
+    # Unsolvable rows (no price, at/below intrinsic) come back as NaN.
+    price   = np.asarray(price, dtype=np.float64)
+    K       = np.asarray(K, dtype=np.float64)
+    is_call = np.asarray(is_call, dtype=bool)
+    iv      = np.full(price.shape, np.nan)
+    if T <= 0: return iv
+
+    with np.errstate(all="ignore"):
+        intrinsic = np.where(is_call, np.maximum(S - K, 0.0), np.maximum(K - S, 0.0))
+        ok = (price > 0) & (K > 0) & (price > intrinsic + 1e-5)
+        if not ok.any(): return iv
+        market, K, is_call = price[ok], K[ok], is_call[ok]
+        fwd, sqrtT, Kdisc  = _bs_fixed(S, K, T, r)
+
+        # The ATM seed alone leaves OTM rows stuck at ~zero vega; never start
+        # below the price-vs-sigma inflection point (Manaster-Koehler).
+        sigma  = np.maximum(SQRT_2PI/sqrt(T) * market/S, np.sqrt(2*np.abs(fwd)/T))
+        sigma  = np.clip(sigma, 1e-3, 5.0)
+        active = np.ones(market.size, dtype=bool)
+        for _ in range(8):
+            s, c = sigma[active], is_call[active]
+            _, d1, d2, Nd1, Nd2, phid1 = _bs_terms(fwd[active], T, sqrtT, s)
+            f     = _bs_price(S, Nd1, Nd2, Kdisc[active], c) - market[active]
+            vega  = S*phid1*sqrtT
+            volga = vega*d1*d2/s
+            step  = f/(vega - 0.5*f*volga/vega)
+            done  = np.abs(f) < 1e-7
+            sigma[active] = np.where(done | ~np.isfinite(step), s, np.clip(s - step, 1e-3, 5.0))
+            active[active] = ~done
+            if not active.any(): break
+        else:
+            # Rows that were still moving on the last step may have landed
+            _, _, _, Nd1, Nd2, _ = _bs_terms(fwd[active], T, sqrtT, sigma[active])
+            f = _bs_price(S, Nd1, Nd2, Kdisc[active], is_call[active]) - market[active]
+            active[active] = ~(np.abs(f) < 1e-7)
+
+        # Anything Halley couldn't pin down (tiny vega, bad seed) falls back to bisection
+        # on the original [1e-5, 10] bracket; 60 halvings exhaust double precision.
+        if active.any():
+            m, fw, kd, c = market[active], fwd[active], Kdisc[active], is_call[active]
+            lo, hi  = np.full(m.size, 1e-5), np.full(m.size, 10.0)
+            for _ in range(60):
+                mid = 0.5*(lo + hi)
+                _, _, _, Nd1, Nd2, _ = _bs_terms(fw, T, sqrtT, mid)
+                below = _bs_price(S, Nd1, Nd2, kd, c) < m
+                lo = np.where(below, mid, lo)
+                hi = np.where(below, hi, mid)
+            sigma[active] = 0.5*(lo + hi)
+
+    sigma[~((sigma > 0.001) & (sigma < 9.9))] = np.nan
+    iv[ok] = sigma
+    return iv
@@ -0,0 +1,38 @@
+# Ahead-of-time build of the Black-Scholes batch kernel so GetChainValues.py
+# doesn't pay Numba's JIT warmup on every run. Run once after install:
+#     python python_code/build_bs.py
+# which writes bs_compiled.*.so next to this file, plus a stamp of the kernel
+# sources it was built from; a stale build (stamp mismatch) is never loaded.
+import os, hashlib
+
+HERE    = os.path.dirname(os.path.abspath(__file__))
+SOURCES = ("bs_numba.py", "build_bs.py")
+STAMP   = os.path.join(HERE, "bs_compiled.stamp")
+
+def source_hash():
+    h = hashlib.sha256()
+    for name in SOURCES:
+        with open(os.path.join(HERE, name), "rb") as f: h.update(f.read())
+    return h.hexdigest()
+
+def build():
+    # numba is only imported here so GetChainValues can check the stamp cheaply
+    from numba.pycc import CC
+    from bs_numba import bs_one
+
+    cc = CC('bs_compiled')
+    cc.output_dir = HERE
+
+    @cc.export('bs_batch', 'void(f8, f8[:], f8, f8, f8[:], b1[:], f8[:], f8[:], f8[:], f8[:], f8[:])')
+    def bs_batch(S, Ks, T, r, sigmas, is_call, price, delta, gamma, vega, theta):
+        # Fills the out arrays in place, one option per iteration (pycc can't compile prange)
+        for i in range(Ks.size):
+            price[i], delta[i], gamma[i], vega[i], theta[i] = bs_one(S, Ks[i], T, r, sigmas[i], is_call[i])
+
+    # Drop the old stamp first so a failed compile can't leave a stale one
+    if os.path.exists(STAMP): os.remove(STAMP)
+    cc.compile()
+    with open(STAMP, "w") as f: f.write(source_hash())
+
+if __name__ == '__main__':
+    build()
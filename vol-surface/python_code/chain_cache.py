@@ -0,0 +1,36 @@
+import os, time, pickle, tempfile
+from collections import namedtuple
+
+# On-disk cache of raw chains so re-runs within a few minutes skip Yahoo.
+# Chain lives here rather than in the script so pickles always reference
+# chain_cache.Chain, never __main__.Chain.
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".yf_cache")
+CACHE_TTL = 300  # seconds
+
+Chain = namedtuple("Chain", ["calls", "puts"])
+
+def _path(ticker, date):
+    return os.path.join(CACHE_DIR, f"{ticker}_{date}.pkl")
+
+def load(ticker, date):
+    # Fresh cached Chain, or None; any unreadable/stale-format pickle is a miss
+    path = _path(ticker, date)
+    try:
+        if time.time() - os.path.getmtime(path) >= CACHE_TTL: return None
+        with open(path, "rb") as f: chain = pickle.load(f)
+        return chain if isinstance(chain, Chain) else None
+    except Exception:
+        return None
+
+def store(ticker, date, chain):
+    # Each writer gets its own temp file, then renames it into place, so
+    # concurrent runs never interleave and readers never see a partial file
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    f = tempfile.NamedTemporaryFile(dir=CACHE_DIR, suffix=".tmp", delete=False)
+    try:
+        with f: pickle.dump(chain, f)
+        os.replace(f.name, _path(ticker, date))
+    except BaseException:
+        try: os.unlink(f.name)
+        except OSError: pass
+        raise
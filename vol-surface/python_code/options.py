@@ -1,48 +1,29 @@
-import math as m
-from scipy.stats import norm
+from bs_numba import bs_terms
+
+# Thin OO wrappers; d1, d2, N(d1), N(d2), phi(d1), sqrt(T) and exp(-rT) are
+# computed once per option in _compute and every greek is read off them
 
 class BlackScholesCall:
-    def callDelta(self, asset_price, asset_volatility, strike_price, time_to_expiration, risk_free_rate):
-        b = m.exp(-risk_free_rate*time_to_expiration)
-        x1 = m.log(asset_price/(strike_price)) + .5*(asset_volatility*asset_volatility)*time_to_expiration
-        x1 = x1/(asset_volatility*(time_to_expiration**.5))
-        z1 = norm.cdf(x1)
-        return z1
-
-    def callGamma(self, asset_price, asset_volatility, strike_price, time_to_expiration, risk_free_rate):
-        b = m.exp(-risk_free_rate*time_to_expiration)
-        x1 = m.log(asset_price/(strike_price)) + .5*(asset_volatility*asset_volatility)*time_to_expiration
-        x1 = x1/(asset_volatility*(time_to_expiration**.5))
-        z1 = norm.cdf(x1)
-        z2 = z1/(asset_price*asset_volatility*m.sqrt(time_to_expiration))
-        return z2
-
-    def callVega(self, asset_price, asset_volatility, strike_price, time_to_expiration, risk_free_rate):
-        b = m.exp(-risk_free_rate*time_to_expiration)
-        x1 = m.log(asset_price/(strike_price)) + .5*(asset_volatility*asset_volatility)*time_to_expiration
-        x1 = x1/(asset_volatility*(time_to_expiration**.5))
-        z1 = norm.pdf(x1)
-        z2 = asset_price*z1*m.sqrt(time_to_expiration)
-        return z2
-
-    def callTheta(self, asset_price, asset_volatility, strike_price, time_to_expiration, risk_free_rate):
-        x1 = m.log(asset_price/(strike_price)) + .5*(asset_volatility*asset_volatility)*time_to_expiration
-        x1 = x1/(asset_volatility*(time_to_expiration**.5))
-        n1 = -((asset_price*asset_volatility*norm.pdf(x1))/(2*m.sqrt(time_to_expiration)))
-        n2 = -(risk_free_rate*strike_price*m.exp(-risk_free_rate*time_to_expiration)*norm.cdf((x1 - (asset_volatility*m.sqrt(time_to_expiration)))))
+    def callDelta(self):
+        return self._Nd1
+
+    def callGamma(self):
+        return self._phi_d1/(self.asset_price*self.asset_volatility*self._sqrtT)
+
+    def callVega(self):
+        return self.asset_price*self._phi_d1*self._sqrtT
+
+    def callTheta(self):
+        n1 = -(self.asset_price*self.asset_volatility*self._phi_d1)/(2*self._sqrtT)
+        n2 = -(self.risk_free_rate*self.strike_price*self._disc*self._Nd2)
         return (n1 + n2)/365
 
-    def callPrice(self, asset_price, asset_volatility, strike_price, time_to_expiration, risk_free_rate):
-        b = m.exp(-risk_free_rate*time_to_expiration)
-        x1 = m.log(asset_price/(strike_price)) + .5*(asset_volatility*asset_volatility)*time_to_expiration
-        x1 = x1/(asset_volatility*(time_to_expiration**.5))
-        z1 = norm.cdf(x1)
-        z1 = z1*asset_price
-        x2 = m.log(asset_price/(strike_price)) - .5*(asset_volatility*asset_volatility)*time_to_expiration
-        x2 = x2/(asset_volatility*(time_to_expiration**.5))
-        z2 = norm.cdf(x2)
-        z2 = b*strike_price*z2
-        return z1 - z2
+    def callPrice(self):
+        return self.asset_price*self._Nd1 - self.strike_price*self._disc*self._Nd2
+
+    def _compute(self):
+        (self._d1, self._d2, self._Nd1, self._Nd2, self._phi_d1, self._sqrtT, self._disc) = bs_terms(
+            self.asset_price, self.strike_price, self.time_to_expiration, self.risk_free_rate, self.asset_volatility)
 
     def __init__(self, asset_price, asset_volatility, strike_price, time_to_expiration, risk_free_rate):
         self.asset_price = asset_price
@@ -50,50 +31,35 @@ class BlackScholesCall:
         self.strike_price = strike_price
         self.time_to_expiration = time_to_expiration
         self.risk_free_rate = risk_free_rate
-        self.price = self.callPrice(asset_price, asset_volatility, strike_price, time_to_expiration, risk_free_rate)
-        self.delta = self.callDelta(asset_price, asset_volatility, strike_price, time_to_expiration, risk_free_rate)
-        self.gamma = self.callGamma(asset_price, asset_volatility, strike_price, time_to_expiration, risk_free_rate)
-        self.vega = self.callVega(asset_price, asset_volatility, strike_price, time_to_expiration, risk_free_rate)
-        self.theta = self.callTheta(asset_price, asset_volatility, strike_price, time_to_expiration, risk_free_rate)
+        self._compute()
+        self.price = self.callPrice()
+        self.delta = self.callDelta()
+        self.gamma = self.callGamma()
+        self.vega = self.callVega()
+        self.theta = self.callTheta()
 
 
 class BlackScholesPut:
-    def putDelta(self, asset_price, asset_volatility, strike_price, time_to_expiration, risk_free_rate):
-        b = m.exp(-risk_free_rate*time_to_expiration)
-        x1 = m.log(asset_price/(strike_price)) + .5*(asset_volatility*asset_volatility)*time_to_expiration
-        x1 = x1/(asset_volatility*(time_to_expiration**.5))
-        z1 = norm.cdf(x1)
-        return z1 - 1
-
-    def putGamma(self, asset_price, asset_volatility, strike_price, time_to_expiration, risk_free_rate):
-        b = m.exp(-risk_free_rate*time_to_expiration)
-        x1 = m.log(asset_price/(strike_price)) + .5*(asset_volatility*asset_volatility)*time_to_expiration
-        x1 = x1/(asset_volatility*(time_to_expiration**.5))
-        z1 = norm.cdf(x1)
-        z2 = z1/(asset_price*asset_volatility*m.sqrt(time_to_expiration))
-        return z2
-
-    def putVega(self, asset_price, asset_volatility, strike_price, time_to_expiration, risk_free_rate):
-        b = m.exp(-risk_free_rate*time_to_expiration)
-        x1 = m.log(asset_price/(strike_price)) + .5*(asset_volatility*asset_volatility)*time_to_expiration
-        x1 = x1/(asset_volatility*(time_to_expiration**.5))
-        z1 = norm.pdf(x1)
-        z2 = asset_price*z1*m.sqrt(time_to_expiration)
-        return z2
-
-    def putTheta(self, asset_price, asset_volatility, strike_price, time_to_expiration, risk_free_rate):
-        x1 = m.log(asset_price/(strike_price)) + .5*(asset_volatility*asset_volatility)*time_to_expiration
-        x1 = x1/(asset_volatility*(time_to_expiration**.5))
-        d2 = x1 - asset_volatility*m.sqrt(time_to_expiration)
-        n1 = -((asset_price*asset_volatility*norm.pdf(x1))/(2*m.sqrt(time_to_expiration)))
-        n2 = -(risk_free_rate*strike_price*m.exp(-risk_free_rate*time_to_expiration)*norm.cdf(-d2))
+    def putDelta(self):
+        return self._Nd1 - 1
+
+    def putGamma(self):
+        return self._phi_d1/(self.asset_price*self.asset_volatility*self._sqrtT)
+
+    def putVega(self):
+        return self.asset_price*self._phi_d1*self._sqrtT
+
+    def putTheta(self):
+        n1 = -(self.asset_price*self.asset_volatility*self._phi_d1)/(2*self._sqrtT)
+        n2 = self.risk_free_rate*self.strike_price*self._disc*(1 - self._Nd2)
         return (n1 + n2)/365
 
-    def putPrice(self, asset_price, asset_volatility, strike_price, time_to_expiration, risk_free_rate):
-        b = m.exp(-risk_free_rate*time_to_expiration)
-        d1 = (m.log(asset_price / strike_price) + (risk_free_rate + 0.5 * asset_volatility**2) * time_to_expiration) / (asset_volatility * m.sqrt(time_to_expiration))
-        d2 = d1 - asset_volatility * m.sqrt(time_to_expiration)
-        return b * strike_price * norm.cdf(-d2) - asset_price * norm.cdf(-d1)
+    def putPrice(self):
+        return self.strike_price*self._disc*(1 - self._Nd2) - self.asset_price*(1 - self._Nd1)
+
+    def _compute(self):
+        (self._d1, self._d2, self._Nd1, self._Nd2, self._phi_d1, self._sqrtT, self._disc) = bs_terms(
+            self.asset_price, self.strike_price, self.time_to_expiration, self.risk_free_rate, self.asset_volatility)
 
     def __init__(self, asset_price, asset_volatility, strike_price, time_to_expiration, risk_free_rate):
         self.asset_price = asset_price
@@ -101,8 +67,9 @@ class BlackScholesPut:
         self.strike_price = strike_price
         self.time_to_expiration = time_to_expiration
         self.risk_free_rate = risk_free_rate
-        self.price = self.putPrice(asset_price, asset_volatility, strike_price, time_to_expiration, risk_free_rate)
-        self.delta = self.putDelta(asset_price, asset_volatility, strike_price, time_to_expiration, risk_free_rate)
-        self.gamma = self.putGamma(asset_price, asset_volatility, strike_price, time_to_expiration, risk_free_rate)
-        self.vega = self.putVega(asset_price, asset_volatility, strike_price, time_to_expiration, risk_free_rate)
-        self.theta = self.putTheta(asset_price, asset_volatility, strike_price, time_to_expiration, risk_free_rate)
\ No newline at end of file
+        self._compute()
+        self.price = self.putPrice()
+        self.delta = self.putDelta()
+        self.gamma = self.putGamma()
+        self.vega = self.putVega()
+        self.theta = self.putTheta()
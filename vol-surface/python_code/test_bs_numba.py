@@ -0,0 +1,33 @@
+import numpy as np
+from scipy.special import ndtr
+from bs_numba import _Phi_approx, _phi, bs_one
+from bs_vec import bs_greeks_vec
+
+S, r = 500.0, 0.05
+K    = np.linspace(300, 800, 201)
+KEYS = ("price", "delta", "gamma", "vega", "theta")
+
+def test_Phi_approx_matches_ndtr():
+    x = np.linspace(-10, 10, 4001)
+    approx = np.array([_Phi_approx(v, _phi(v)) for v in x])
+    assert np.abs(approx - ndtr(x)).max() < 1e-7
+
+def test_bs_one_matches_bs_greeks_vec():
+    for T in (1/365, 0.02, 0.3, 2.0):
+        for sigma in (0.05, 0.2, 0.8):
+            for is_call in (True, False):
+                vec = bs_greeks_vec(S, K, T, r, np.full(K.size, sigma), np.full(K.size, is_call))
+                one = np.array([bs_one(S, k, T, r, sigma, is_call) for k in K]).T
+                got = dict(zip(KEYS, one))
+                # A&S error is absolute: deep-OTM prices near 1e-12 can be off
+                # by orders of magnitude relatively but never by more than this
+                assert (np.abs(got["price"] - vec["price"]) <= 1e-7*(S + K)).all()
+                np.testing.assert_allclose(got["delta"], vec["delta"], rtol=0, atol=1e-7)
+                np.testing.assert_allclose(got["theta"], vec["theta"], rtol=0, atol=1e-7)
+                # gamma and vega only use phi(d1), no CDF
+                np.testing.assert_allclose(got["gamma"], vec["gamma"], rtol=1e-10)
+                np.testing.assert_allclose(got["vega"],  vec["vega"],  rtol=1e-10, atol=1e-12)
+
+def test_bs_one_unpriceable_is_nan():
+    for sigma, k, T in ((np.nan, 500.0, 0.1), (0.2, 0.0, 0.1), (0.2, 500.0, 0.0)):
+        assert np.isnan(bs_one(S, k, T, r, sigma, True)).all()
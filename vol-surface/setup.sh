@@ -6,15 +6,19 @@ echo "  Setting up vol-surface..."
 echo ""
 
 # ─── Python venv ──────────────────────────────────────────────────────────────
-echo "  [1/3] Creating Python venv..."
+echo "  [1/4] Creating Python venv..."
 python3 -m venv venv
 
-echo "  [2/3] Installing Python dependencies..."
+echo "  [2/4] Installing Python dependencies..."
 venv/bin/pip install --quiet --upgrade pip
-venv/bin/pip install --quiet yfinance
+venv/bin/pip install --quiet -r requirements.txt
+
+echo "  [3/4] Compiling Black-Scholes kernel..."
+# Optional: without a C toolchain GetChainValues.py falls back to NumPy greeks
+venv/bin/python python_code/build_bs.py || echo "  (AOT build skipped; using NumPy greeks)"
 
 # ─── Node deps ────────────────────────────────────────────────────────────────
-echo "  [3/3] Installing Node dependencies..."
+echo "  [4/4] Installing Node dependencies..."
 npm install
 
 echo ""